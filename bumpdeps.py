@@ -21,6 +21,7 @@ https://peps.python.org/pep-0508/
 
 import argparse
 from collections import abc
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date as Date
 from json import JSONDecodeError
 import logging
@@ -31,10 +32,26 @@ import sys
 import requests
 import tomlkit
 from tomlkit.exceptions import TOMLKitError
+from tomlkit.items import Array, Null
 from packaging.requirements import Requirement, InvalidRequirement
-from packaging.specifiers import Specifier, SpecifierSet
-from packaging.utils import canonicalize_name
-from packaging.version import Version
+from packaging.specifiers import InvalidSpecifier, Specifier, SpecifierSet
+from packaging.utils import canonicalize_name, parse_sdist_filename, parse_wheel_filename
+from packaging.version import InvalidVersion, Version
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover
+    import tomli as tomllib
 
 
 __version__ = '0.2.1'
@@ -46,11 +63,23 @@ Upper pinning of dependencies is generally not a good idea outside of deployment
 This utility is intended for cases where it can't be avoided.
 '''
 
+MAX_WORKERS = 16
+SIMPLE_JSON = 'application/vnd.pypi.simple.v1+json'
+
 LOGGER = logging.getLogger('bumpdeps')
 LOGGER.addHandler(logging.NullHandler())
 
-COMMENT_RE = re.compile(r'[\s#]*bumpdeps:\s*(.+)\s*$')
-IGNORE_UNTIL_RE = re.compile(r'ignore-until\s*=\s*(\d{4}-\d{2}-\d{2})\s*$')
+# PEP 508 package name at the start of a requirement
+# Name must be followed by a delimiter, so partial names are not matched
+NAME_RE = re.compile(
+    r'\s*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)'
+    r'(?=\s*(?:[\[(;@,]|===?|[~!<>]=|[<>]|$))'
+)
+
+# Captures directives and, if present, the ignore-until date in a single pass
+DIRECTIVE_RE = re.compile(
+    r'[\s#]*bumpdeps:\s*(?P<directives>.*?(?:ignore-until\s*=\s*(?P<date>\d{4}-\d{2}-\d{2}))?)\s*$'
+)
 
 
 class BumpDepsError(Exception):
@@ -66,14 +95,67 @@ def _dump_requirement(req):
     https://github.com/pypa/packaging/issues/654
     """
 
+    parts = [req.name]
+
+    if req.extras:
+        parts.append(f'[{",".join(req.extras)}]')
+
     # pylint: disable=protected-access
-    return ' '.join(filter(bool, (
-        req.name,
-        f'[{",".join(req.extras)}]' if req.extras else None,
-        ', '.join(sorted(f'{spec.operator} {spec.version}' for spec in req.specifier._specs)),
-        f'@ {req.url}' if req.url else None,
-        f'; {req.marker}' if req.marker else None,
-    )))
+    specs = sorted(f'{spec.operator} {spec.version}' for spec in req.specifier._specs)
+    if specs:
+        parts.append(', '.join(specs))
+
+    if req.url:
+        parts.append(f'@ {req.url}')
+
+    if req.marker:
+        parts.append(f'; {req.marker}')
+
+    return ' '.join(parts)
+
+
+class _ErrorCounter(logging.Handler):
+    """
+    Logging handler which counts logged errors
+    """
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.errors = 0
+
+    def emit(self, record):
+        self.errors += 1
+
+
+class _NameFilter:
+    """
+    Filter for package names based on a regular expression
+    Like re.match(), only the start of the name must match
+
+    Alternations of plain names, such as 'foo|bar', are common and are checked
+    with str.startswith() rather than a regular expression
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        literals = tuple(pattern.split('|'))
+
+        if all(re.escape(literal) == literal for literal in literals):
+            self._literals = literals
+            self._regex = None
+        else:
+            self._literals = None
+            self._regex = re.compile(pattern)
+
+    def match(self, name):
+        """
+        Return True if name matches filter
+        """
+
+        if self._regex is None:
+            return name.startswith(self._literals)
+
+        return self._regex.match(name) is not None
 
 
 class PyPI:
@@ -84,16 +166,170 @@ class PyPI:
 
     def __init__(self, base_url='https://pypi.org') -> None:
         self.base_url = base_url
+        self._cache = {}
+
+        # Reuse connections across queries, pool is sized for concurrent queries
+        self.session = requests.Session()
+        self.session.headers['Accept'] = 'application/json'
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=MAX_WORKERS)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def get_latest_package_version(self, package):
         """
         Query latest package version from package index
+        Results are cached, so each package is only queried once per instance
+
+        The JSON Simple API (PEP 691) is tried first since responses are much smaller
+        If it's not supported by the package index, the PyPI JSON API is used instead
+        """
+
+        name = canonicalize_name(package)
+        if name in self._cache:
+            LOGGER.debug('Using cached version for %s', package)
+            return self._cache[name]
+
+        version = self._query_simple(package, name)
+        if version is None:
+            version = self._query_json(package, name)
+
+        self._cache[name] = version
+        return version
+
+    def _query_simple(self, package, name):
+        """
+        Query latest package version from JSON Simple API
+        Returns None if the API is not supported or the latest release can't be determined
         """
 
-        url = '/'.join((self.base_url, 'pypi', canonicalize_name(package), 'json'))
+        url = '/'.join((self.base_url, 'simple', name, ''))
 
         LOGGER.debug('Querying latest version for %s from %s', package, url)
-        response = requests.get(url, headers={'Accept': 'application/json'}, timeout=5)
+        response = self.session.get(url, headers={'Accept': SIMPLE_JSON}, timeout=5)
+
+        if response.status_code == 406:
+            LOGGER.debug('JSON Simple API not supported by %s', self.base_url)
+            return None
+
+        # Indexes may only implement the PyPI JSON API
+        if response.status_code == 404:
+            LOGGER.debug('Package %s not found in JSON Simple API', package)
+            return None
+
+        self._check_response(package, response)
+
+        if response.headers.get('Content-Type', '').split(';')[0].strip() != SIMPLE_JSON:
+            LOGGER.debug('JSON Simple API not supported by %s', self.base_url)
+            return None
+
+        data = self._load_json(response)
+        try:
+            releases = self._get_releases(package, data)
+        except (KeyError, TypeError, AttributeError) as e:
+            raise BumpDepsError(
+                f'Unexpected JSON structure returned from package index: {data}'
+            ) from e
+
+        if not releases:
+            LOGGER.debug('No usable releases found for %s in JSON Simple API', package)
+            return None
+
+        # Like the PyPI JSON API, prefer final releases
+        final_releases = [release for release in releases if not release.is_prerelease]
+        return str(max(final_releases or releases))
+
+    @staticmethod
+    def _get_releases(package, data):
+        """
+        Get available releases from a JSON Simple API response
+
+        If versions are listed (PEP 700), files are only used to determine yanked releases
+        Otherwise, releases are determined from file names
+        Returns None if releases can't be determined
+        """
+
+        versions = data.get('versions')  # API version 1.1 and later
+        releases = set()
+        yanked = set()
+
+        for file in data['files']:
+            try:
+                if file['filename'].endswith('.whl'):
+                    release = parse_wheel_filename(file['filename'])[1]
+                else:
+                    release = parse_sdist_filename(file['filename'])[1]
+            except ValueError:  # Legacy file format or non-standard version
+                if versions is None and not file.get('yanked'):
+                    # Release can't be identified, so latest version can't be determined
+                    LOGGER.debug('Unable to determine version for %s from file %s',
+                                 package, file['filename'])
+                    return None
+                continue
+
+            if file.get('yanked'):
+                yanked.add(release)
+            else:
+                releases.add(release)
+
+        if versions is not None:
+            # Releases are only excluded if all of their files were yanked
+            yanked -= releases
+            releases = set()
+            for version in versions:
+                try:
+                    release = Version(version)
+                except InvalidVersion:
+                    continue
+
+                if release not in yanked:
+                    releases.add(release)
+
+        # Local versions aren't valid in specifiers and aren't served by PyPI
+        return {release for release in releases if release.local is None}
+
+    def _query_json(self, package, name):
+        """
+        Query latest package version from PyPI JSON API
+        """
+
+        url = '/'.join((self.base_url, 'pypi', name, 'json'))
+
+        LOGGER.debug('Querying latest version for %s from %s', package, url)
+        response = self.session.get(url, timeout=5, stream=ijson is not None)
+
+        self._check_response(package, response)
+
+        # Responses include all releases, so stop reading once the version is found
+        if ijson is not None:
+            with response:
+                response.raw.decode_content = True
+                try:
+                    version = next(ijson.items(response.raw, 'info.version'))
+                except ijson.JSONError as e:
+                    raise BumpDepsError(f'Invalid JSON returned from package index: {e}') from e
+                except StopIteration as e:
+                    raise BumpDepsError(
+                        'Unexpected JSON structure returned from package index: '
+                        'info.version not found'
+                    ) from e
+
+                # Discard the rest of the response so the connection can be reused
+                response.raw.drain_conn()
+                return version
+
+        data = self._load_json(response)
+        try:
+            return data['info']['version']
+        except (KeyError, TypeError) as e:
+            raise BumpDepsError(
+                f'Unexpected JSON structure returned from package index: {data}'
+            ) from e
+
+    @staticmethod
+    def _check_response(package, response):
+        """
+        Raise a BumpDepsError if response has an error status
+        """
 
         try:
             response.raise_for_status()  # Improve error handling later
@@ -102,14 +338,19 @@ class PyPI:
                 f'Unable to query package index for {package}: {e} {response.text}'
             ) from e
 
+    @staticmethod
+    def _load_json(response):
+        """
+        Parse JSON from response
+        orjson is used if installed since it is considerably faster for large responses
+        """
+
         try:
-            return response.json()['info']['version']
+            if orjson is None:
+                return response.json()
+            return orjson.loads(response.content)
         except JSONDecodeError as e:
             raise BumpDepsError(f'Invalid JSON returned from package index: {e}') from e
-        except KeyError as e:
-            raise BumpDepsError(
-                f'Unexpected JSON structure returned from package index: {response.json()}'
-            ) from e
 
 
 class BumpDeps:
@@ -136,31 +377,204 @@ class BumpDeps:
 
         updates = {'dependencies': [], 'optional-dependencies': {}}
 
+        # Compile filters once rather than for each dependency
+        include = _NameFilter(include) if include else None
+        exclude = _NameFilter(exclude) if exclude else None
+
         LOGGER.debug('Loading configuration from %s', self.filepath)
         try:
-            with self.filepath.open('r', encoding='utf-8') as config_file:
-                config = tomlkit.load(config_file)
-        except (OSError, TOMLKitError) as e:
+            text = self.filepath.read_text(encoding='utf-8')
+        except OSError as e:
             raise BumpDepsError(f'Error loading {self.filepath}: {e}') from e
 
+        # Comments are only needed for directives, so only preserve style if there are any
+        config = self._load(text, preserve_style='bumpdeps:' in text)
+
         if 'project' not in config:
             raise BumpDepsError(f'No project section in file {self.filepath}')
 
-        # Update base dependencies
+        # Filter requirements before querying the package index
+        candidates = [
+            (extra, self._get_candidates(section, include=include, exclude=exclude))
+            for extra, section in self._get_sections(config, base, extras)
+        ]
+
+        # Query package index for all remaining packages at once
+        versions = self._get_latest_versions(
+            req.name for _, reqs in candidates for _, req in reqs
+        )
+
+        # Determine updates for each section
+        changes = [(extra, self._update_deps(reqs, versions)) for extra, reqs in candidates]
+        for extra, section_changes in changes:
+            if extra is None:
+                updates['dependencies'] = [change[1:] for change in section_changes]
+            else:
+                updates['optional-dependencies'][extra] = [change[1:] for change in section_changes]
+
+        # If dry run, return changes
+        if dry_run:
+            LOGGER.debug('Dry run. No changes persisted')
+            return updates
+
+        if updates['dependencies'] or any(updates['optional-dependencies'].values()):
+            self._persist(text, config, changes)
+        else:
+            LOGGER.debug('No changes to persisted')
+
+        return updates
+
+    def _persist(self, text, config, changes):
+        """
+        Apply changes from _update_deps() and write to file
+        """
+
+        # Replace requirements in place when possible to avoid serializing full document
+        new_text = self._splice(text, changes)
+
+        if new_text is None:
+            LOGGER.debug('Unable to replace requirements in place, serializing full document')
+
+            # Style must be preserved when writing
+            if not isinstance(config, tomlkit.TOMLDocument):
+                config = self._load(text)
+
+            self._apply_changes(config, changes)
+            new_text = tomlkit.dumps(config)
+
+        self._write(new_text)
+
+    @staticmethod
+    def _get_section(config, extra):
+        """
+        Get dependency section for an extra, or base if extra is None
+        """
+
+        if extra is None:
+            return config['project']['dependencies']
+
+        return config['project']['optional-dependencies'][extra]
+
+    def _apply_changes(self, config, changes):
+        """
+        Apply changes from _update_deps() to configuration
+
+        Replacing a value in an array doesn't shift other values,
+        so changes can be applied in any order
+        """
+
+        for extra, section_changes in changes:
+            if not section_changes:
+                continue
+
+            section = self._get_section(config, extra)
+            for idx, _, new_req in section_changes:
+                section[idx] = new_req
+
+    def _get_replacements(self, config, changes):
+        """
+        Map original requirement strings to new requirement strings
+        Returns a dictionary of original strings and [new string, count] lists
+        """
+
+        replacements = {}
+        for extra, section_changes in changes:
+            section = self._get_section(config, extra)
+            for idx, _, new_req in section_changes:
+                replacements.setdefault(section[idx], [new_req, 0])[1] += 1
+
+        return replacements
+
+    def _splice(self, text, changes):
+        """
+        Replace requirement strings in the original text
+
+        Only used if each requirement string is found the expected number of times
+        The result is parsed and compared to the expected configuration
+        Returns None if replacement fails
+        """
+
+        # tomlkit is more lenient, so the file may not be loadable here
+        try:
+            expected = tomllib.loads(text)
+        except tomllib.TOMLDecodeError:
+            return None
+
+        replacements = self._get_replacements(expected, changes)
+        self._apply_changes(expected, changes)
+
+        # Requirements may be basic or literal strings
+        new_text = text
+        for old_value, (new_value, count) in replacements.items():
+            forms = [tomlkit.item(old_value).as_string()]
+            if "'" not in old_value:
+                forms.append(f"'{old_value}'")
+
+            if sum(text.count(form) for form in forms) != count:
+                return None
+
+            LOGGER.debug("Replacing requirement '%s' with '%s'", old_value, new_value)
+            for form in forms:
+                new_text = new_text.replace(form, tomlkit.item(new_value).as_string())
+
+        try:
+            result = tomllib.loads(new_text)
+        except tomllib.TOMLDecodeError:
+            result = None
+
+        return new_text if result == expected else None
+
+    def _load(self, text, preserve_style=True):
+        """
+        Parse TOML text
+
+        If preserve_style is False, a faster parser is used,
+        but comments are not available and the result can not be written
+        """
+
+        if not preserve_style:
+            try:
+                return tomllib.loads(text)
+            except tomllib.TOMLDecodeError as e:
+                # tomlkit is more lenient, so only fail if it can't load the file either
+                LOGGER.debug('Unable to load %s with fast parser: %s', self.filepath, e)
+
+        try:
+            return tomlkit.loads(text)
+        except TOMLKitError as e:
+            raise BumpDepsError(f'Error loading {self.filepath}: {e}') from e
+
+    def _write(self, text):
+        """
+        Write toml to temp file and move into place
+        """
+
+        temp_path = self.filepath.with_suffix('._bumpdeps')
+        LOGGER.debug("Writing output to temp file '%s'", temp_path)
+        with temp_path.open('w', encoding='utf-8') as temp_file:
+            temp_file.write(text)
+
+        LOGGER.debug("Moving '%s' to '%s'", temp_path, self.filepath)
+        temp_path.replace(self.filepath)
+
+    @staticmethod
+    def _get_sections(config, base, extras):
+        """
+        Determine dependency sections to update
+        Returns a list of (extra, section) tuples, extra is None for base dependencies
+        """
+
+        sections = []
         if base is True and 'dependencies' in config['project']:
             LOGGER.debug('Updating base dependencies')
-            updates['dependencies'] = self._update_deps(
-                config['project']['dependencies'], include=include, exclude=exclude
-            )
+            sections.append((None, config['project']['dependencies']))
 
-        # Update optional dependencies
         opt_deps = config['project'].get('optional-dependencies')
 
         if opt_deps and extras is True:
-            for extra, section in config['project']['optional-dependencies'].items():
+            for extra, section in opt_deps.items():
                 LOGGER.debug('Updating optional dependencies for extra %s', extra)
-                updates['optional-dependencies'][extra] = self._update_deps(
-                    section, include=include, exclude=exclude)
+                sections.append((extra, section))
 
         elif opt_deps and isinstance(extras, abc.Iterable):
             for extra in extras:
@@ -169,108 +583,182 @@ class BumpDeps:
                     continue
 
                 LOGGER.debug('Updating optional dependencies for extra %s', extra)
-                updates['optional-dependencies'][extra] = self._update_deps(
-                    opt_deps[extra], include=include, exclude=exclude)
-
-        # If dry run, return changes
-        if dry_run:
-            LOGGER.debug('Dry run. No changes persisted')
-            return updates
-
-        # Write toml to temp file
-        if updates['dependencies'] or any(updates['optional-dependencies'].values()):
+                sections.append((extra, opt_deps[extra]))
 
-            temp_path = self.filepath.with_suffix('._bumpdeps')
-            LOGGER.debug("Writing output to temp file '%s'", temp_path)
-            with temp_path.open('w', encoding='utf-8') as temp_file:
-                tomlkit.dump(config, temp_file)
-
-            LOGGER.debug("Moving '%s' to '%s'", temp_path, self.filepath)
-            temp_path.replace(self.filepath)
-        else:
-            LOGGER.debug('No changes to persisted')
-
-        return updates
+        return sections
 
     def _ignore_for_comment(self, comment):
 
-        match = COMMENT_RE.search(comment)
+        match = DIRECTIVE_RE.search(comment)
 
         if match is None:
             return False
 
-        directives = match[1]
-        if 'ignore-until' in directives:
-            date_match = IGNORE_UNTIL_RE.search(directives)
-            if date_match is None:
-                LOGGER.error('Invalid format for ignore-until: %s', directives)
-            else:
-                try:
-                    return Date.fromisoformat(date_match[1]) > Date.today()
+        directives = match['directives']
+        if match['date'] is not None:
+            try:
+                return Date.fromisoformat(match['date']) > Date.today()
+
+            except ValueError:
+                LOGGER.error('Invalid date provided for ignore-until: %s', match['date'])
 
-                except ValueError:
-                    LOGGER.error('Invalid date provided for ignore-until: %s', date_match[1])
+        elif 'ignore-until' in directives:
+            LOGGER.error('Invalid format for ignore-until: %s', directives)
 
         # Skip if ignore
         return 'ignore' in directives
 
-    def _update_deps(self, section, include=None, exclude=None):
+    @staticmethod
+    def _section_values(section):
         """
-        Update dependencies for an extra section or base
+        Get requirements in a dependency section
+        Returns a list of (index, value, comment) tuples
+        comment is always None if style isn't preserved
         """
 
-        updates = []
+        if not isinstance(section, Array):
+            return [(idx, value, None) for idx, value in enumerate(section)]
 
         # A little bit of a hack in order to be able to read comments
-        for idx, spec in enumerate(section._value):  # pylint: disable=protected-access
-            if not spec.value:  # tomlkit._ArrayItemGroup
+        # Groups without values, such as comment-only lines, are not indexed
+        groups = [
+            group for group in section._value  # pylint: disable=protected-access
+            if group.value is not None and not isinstance(group.value, Null)
+        ]
+
+        return [(idx, group.value, group.comment) for idx, group in enumerate(groups)]
+
+    @staticmethod
+    def _filtered(name, include, exclude, debug):
+        """
+        Determine if a package is excluded by filters
+
+        include and exclude are _NameFilter instances or None
+        """
+
+        if exclude and exclude.match(name):
+            if debug:
+                LOGGER.debug('Skipping package %s for exclude filter: %s', name, exclude.pattern)
+            return True
+
+        if include and not include.match(name):
+            if debug:
+                LOGGER.debug('Skipping package %s for include filter: %s', name, include.pattern)
+            return True
+
+        return False
+
+    def _get_candidates(self, section, include=None, exclude=None):
+        """
+        Get requirements which may need to be updated for an extra section or base
+
+        include and exclude are _NameFilter instances or None
+        Returns a list of (index, requirement) tuples
+        """
+
+        candidates = []
+
+        # Avoid overhead of logging calls in loop when debug isn't enabled
+        debug = LOGGER.isEnabledFor(logging.DEBUG)
+
+        for idx, value, comment in self._section_values(section):
+
+            # Skip empty strings, but still count them for indexing
+            if not value:
+                continue
+
+            # Filters only need the name, so check them before parsing the full requirement
+            # If the name can't be found, filters are checked after parsing
+            name_match = NAME_RE.match(value)
+            if name_match and self._filtered(name_match[1], include, exclude, debug):
                 continue
 
             # Parse requirement
             try:
-                req = Requirement(spec.value)
+                req = Requirement(value)
             except InvalidRequirement as e:
-                raise BumpDepsError(f"Invalid requirement '{spec.value}': {e}") from e
-
-            if exclude and re.match(exclude, req.name):
-                LOGGER.debug('Skipping package %s for exclude filter: %s', req.name, exclude)
-                continue
+                raise BumpDepsError(f"Invalid requirement '{value}': {e}") from e
 
-            if include and not re.match(include, req.name):
-                LOGGER.debug('Skipping package %s for include filter: %s', req.name, include)
+            if not name_match and self._filtered(req.name, include, exclude, debug):
                 continue
 
             # Check comments
-            if spec.comment and self._ignore_for_comment(str(spec.comment)):
-                LOGGER.debug('Skipping package %s for comment: %s', req.name, spec.comment)
+            if comment and self._ignore_for_comment(str(comment)):
+                if debug:
+                    LOGGER.debug('Skipping package %s for comment: %s', req.name, comment)
                 continue
 
             # No need to update if no specifiers are defined
             if not req.specifier:
-                LOGGER.debug('Skipping package %s since no specifiers defined', req.name)
+                if debug:
+                    LOGGER.debug('Skipping package %s since no specifiers defined', req.name)
                 continue
 
-            # Get latest version
-            latest = self.pkg_index.get_latest_package_version(req.name)
-            LOGGER.debug('Latest version for package %s is %s', req.name, latest)
+            candidates.append((idx, req))
+
+        return candidates
+
+    def _get_latest_versions(self, packages):
+        """
+        Query package index for the latest version of each package
+        Queries are made concurrently since they are bound by network latency
+        Returns a dictionary of canonical package names and versions
+        """
+
+        # Only query each package once, but use the name as given for messages
+        names = {}
+        for package in packages:
+            names.setdefault(canonicalize_name(package), package)
+
+        if not names:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(names))) as executor:
+            return dict(
+                zip(names, executor.map(self.pkg_index.get_latest_package_version, names.values()))
+            )
+
+    def _update_deps(self, candidates, versions):
+        """
+        Determine updated dependencies for an extra section or base
+
+        candidates is a list of (index, requirement) tuples from _get_candidates()
+        versions is a dictionary of canonical package names and latest versions
+        Returns a list of (index, old requirement, new requirement) tuples
+        """
+
+        updates = []
+
+        # Avoid overhead of logging calls in loop when debug isn't enabled
+        debug = LOGGER.isEnabledFor(logging.DEBUG)
+
+        for idx, req in candidates:
+
+            latest = versions[canonicalize_name(req.name)]
+            if debug:
+                LOGGER.debug('Latest version for package %s is %s', req.name, latest)
 
             # No need to update if latest version isn't precluded
-            if next(req.specifier.filter((latest,)), False):
-                LOGGER.debug('Skipping package %s since latest version applies', req.name)
+            # Pre-releases are allowed since latest is only a pre-release if no final releases exist
+            if req.specifier.contains(latest, prereleases=True):
+                if debug:
+                    LOGGER.debug('Skipping package %s since latest version applies', req.name)
                 continue
 
             # Capture requirement before updating
             old_req = _dump_requirement(req)
-            LOGGER.debug("Updating specifiers for requirement '%s'", old_req)
+            if debug:
+                LOGGER.debug("Updating specifiers for requirement '%s'", old_req)
 
             # Update specifiers
-            req.specifier = self._update_specifiers(req.specifier, latest)
+            try:
+                req.specifier = self._update_specifiers(req.specifier, latest)
+            except (InvalidSpecifier, InvalidVersion) as e:
+                raise BumpDepsError(
+                    f"Unable to update requirement '{old_req}' to version {latest}: {e}"
+                ) from e
             new_req = _dump_requirement(req)
-
-            # Update section
-            LOGGER.debug("Re-adding updated requirement '%s'", new_req)
-            section[idx] = new_req
-            updates.append((old_req, new_req))
+            updates.append((idx, old_req, new_req))
 
         return updates
 
@@ -279,6 +767,7 @@ class BumpDeps:
         Update a specifier set for a dependency
         """
 
+        latest_version = Version(latest)
         resultant_specifiers = []
         for specifier in specifier_set:
             # No maximum version specified, so keep as is
@@ -287,17 +776,12 @@ class BumpDeps:
 
             # Specific or max version specified, replace with the latest
             elif specifier.operator in ('==', '===', '<', '<='):
-                version = Version(specifier.version)
                 new = Specifier(f'{specifier.operator}{latest}')
                 resultant_specifiers.append(new)
 
             # Compatibility operator, try to match places
             elif specifier.operator == '~=':
                 version = Version(specifier.version)
-                latest_version = Version(latest)
-
-            # If maximum version is specified, see how many places are specified
-                version = Version(specifier.version)
 
                 # Less than 3 places are occupied and latest has at least 3, use 2
                 if len(version.release) < 3 <= len(latest_version.release):
@@ -373,6 +857,10 @@ def main(args=None):
 
     options = cli(args)
     bumper = BumpDeps(options.file, options.pkg_index)
+
+    # Count errors logged while bumping to set return value
+    error_counter = _ErrorCounter()
+    LOGGER.addHandler(error_counter)
     try:
         updates = bumper.bump(
             (options.base or options.all or not options.extras) and not options.no_base,
@@ -382,6 +870,8 @@ def main(args=None):
     except BumpDepsError as e:
         LOGGER.error('%s', e)
         sys.exit(8)
+    finally:
+        LOGGER.removeHandler(error_counter)
 
     # Notify user of updates
     if updates['dependencies'] or any(updates['optional-dependencies'].values()):
@@ -403,7 +893,7 @@ def main(args=None):
         print('No updates required')
 
     # Set return value if an error was logged
-    if LOGGER._cache.get(logging.ERROR):  # pylint: disable=protected-access
+    if error_counter.errors:
         sys.exit(9)
 
     sys.exit(0)
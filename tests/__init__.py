@@ -12,13 +12,34 @@
 from contextlib import contextmanager
 import difflib
 from dataclasses import dataclass
+import functools
+import os
+import re
 import unittest
 from pathlib import Path
+import tempfile
 from tempfile import NamedTemporaryFile
 
 import responses
 
 
+SIMPLE_JSON = 'application/vnd.pypi.simple.v1+json'
+
+
+@functools.lru_cache(maxsize=None)
+def regex(pattern):
+    """
+    Compile and cache patterns used in assertions
+    """
+
+    return re.compile(pattern)
+
+
+# Use memory-backed temporary files when available
+if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+    tempfile.tempdir = '/dev/shm'
+
+
 EXAMPLE = """
 [project]
 dependencies = [
@@ -69,6 +90,28 @@ DIFF_EXTRAS = (
     '+     "six == 1.16.0",  # bumpdeps: ignore-until=1984-01-01',
 )
 
+# File diff for base dependencies and all extras
+DIFF_ALL = DIFF_BASE + DIFF_EXTRAS
+
+
+def simple_json(*filenames, yanked=(), versions=None):
+    """
+    Generate a JSON Simple API response for the given files
+    If versions are given, an API version 1.1 (PEP 700) response is generated
+    """
+
+    data = {
+        'meta': {'api-version': '1.0' if versions is None else '1.1'},
+        'files': [
+            {'filename': filename, 'yanked': filename in yanked} for filename in filenames
+        ],
+    }
+
+    if versions is not None:
+        data['versions'] = list(versions)
+
+    return data
+
 
 @ dataclass
 class Result:
@@ -110,45 +153,106 @@ def write_and_diff(text):
         test_file.close()
 
 
-class MockedResponse(unittest.TestCase):
+def _get_mocked_responses():
     """
-    Test case class with mocked PyPI responses
+    Build mocked package index responses
+    Returns a tuple of (URL, keyword arguments) tuples
     """
 
-    def setUp(self) -> None:
+    mocked = []
+
+    for package, version in (
+        ('requests', '2.28.2'),
+        ('packaging', '23.1'),
+        ('enlighten', '1.11.1'),
+        ('blessed', '1.19.1'),
+        ('prefixed', '0.6.0'),
+        ('sphinx', '6.1.2'),
+        ('jinxed', '1.2.0'),
+        ('six', '1.16.0'),
+        ('pylint', '2.15.10'),
+    ):
+        mocked.append((
+            f'https://pypi.org/simple/{package}/',
+            {'json': simple_json(f'{package}-0.1.tar.gz', f'{package}-{version}.tar.gz'),
+             'content_type': SIMPLE_JSON, 'status': 200}
+        ))
+
+    mocked.append(('https://pypi.org/simple/no-such-package/',
+                   {'json': {"message": "Not Found"}, 'status': 404}))
+
+    mocked.append(('https://pypi.org/simple/invalid-json/',
+                   {'body': 'Hello!', 'content_type': SIMPLE_JSON, 'status': 200}))
+
+    mocked.append(('https://pypi.org/simple/unexpected-json/',
+                   {'json': {'version': '1.2.3'}, 'content_type': SIMPLE_JSON, 'status': 200}))
 
-        responses.get('https://pypi.org/pypi/requests/json',
-                      json={'info': {'version': '2.28.2'}}, status=200)
+    # Packages only available through the PyPI JSON API
+    for package in ('legacy', 'legacy-invalid-json', 'legacy-unexpected-json'):
+        mocked.append((f'https://pypi.org/simple/{package}/', {'status': 406}))
 
-        responses.get('https://pypi.org/pypi/packaging/json',
-                      json={'info': {'version': '23.1'}}, status=200)
+    mocked.append(('https://pypi.org/simple/html-only/',
+                   {'body': '<html></html>', 'content_type': 'text/html', 'status': 200}))
 
-        responses.get('https://pypi.org/pypi/enlighten/json',
-                      json={'info': {'version': '1.11.1'}}, status=200)
+    mocked.append(('https://pypi.org/simple/eggs-only/',
+                   {'json': simple_json('eggs_only-1.0-py3.7.egg'),
+                    'content_type': SIMPLE_JSON, 'status': 200}))
 
-        responses.get('https://pypi.org/pypi/blessed/json',
-                      json={'info': {'version': '1.19.1'}}, status=200)
+    mocked.append(('https://pypi.org/simple/yanked-only/',
+                   {'json': simple_json('yanked_only-1.0.tar.gz',
+                                        yanked=('yanked_only-1.0.tar.gz',)),
+                    'content_type': SIMPLE_JSON, 'status': 200}))
 
-        responses.get('https://pypi.org/pypi/prefixed/json',
-                      json={'info': {'version': '0.6.0'}}, status=200)
+    mocked.append(('https://pypi.org/simple/legacy-latest/',
+                   {'json': simple_json('legacy_latest-1.0.tar.gz', 'legacy_latest-2.0.tar.bz2'),
+                    'content_type': SIMPLE_JSON, 'status': 200}))
 
-        responses.get('https://pypi.org/pypi/sphinx/json',
-                      json={'info': {'version': '6.1.2'}}, status=200)
+    mocked.append(('https://pypi.org/simple/json-only/',
+                   {'json': {"message": "Not Found"}, 'status': 404}))
 
-        responses.get('https://pypi.org/pypi/jinxed/json',
-                      json={'info': {'version': '1.2.0'}}, status=200)
+    mocked.append(('https://pypi.org/pypi/no-such-package/json',
+                   {'json': {"message": "Not Found"}, 'status': 404}))
 
-        responses.get('https://pypi.org/pypi/six/json',
-                      json={'info': {'version': '1.16.0'}}, status=200)
+    for package in (
+        'legacy', 'html-only', 'eggs-only', 'yanked-only', 'legacy-latest', 'json-only'
+    ):
+        mocked.append((f'https://pypi.org/pypi/{package}/json',
+                       {'json': {'info': {'version': '2.0.0'}}, 'status': 200}))
 
-        responses.get('https://pypi.org/pypi/pylint/json',
-                      json={'info': {'version': '2.15.10'}}, status=200)
+    mocked.append(('https://pypi.org/pypi/legacy-invalid-json/json',
+                   {'body': 'Hello!', 'status': 200}))
 
-        responses.get('https://pypi.org/pypi/no-such-package/json',
-                      json={"message": "Not Found"}, status=404)
+    mocked.append(('https://pypi.org/pypi/legacy-unexpected-json/json',
+                   {'json': {'version': '1.2.3'}, 'status': 200}))
 
-        responses.get('https://pypi.org/pypi/invalid-json/json',
-                      body='Hello!', status=200)
+    return tuple(mocked)
+
+
+class MockedResponse(unittest.TestCase):
+    """
+    Test case class with mocked PyPI responses
+
+    Requests are mocked for the whole class
+    Mocked responses are reset before each test
+    """
+
+    MOCKED_RESPONSES = _get_mocked_responses()
+    responses = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+
+        cls.responses = responses.RequestsMock(assert_all_requests_are_fired=False)
+        cls.responses.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+
+        cls.responses.stop()
+        cls.responses.reset()
+
+    def setUp(self) -> None:
 
-        responses.get('https://pypi.org/pypi/unexpected-json/json',
-                      json={'version': '1.2.3'}, status=200)
+        self.responses.reset()
+        for url, kwargs in self.MOCKED_RESPONSES:
+            self.responses.get(url, **kwargs)
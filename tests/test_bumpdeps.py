@@ -9,10 +9,184 @@
 **BumpDeps class Unit Tests**
 """
 
-import responses
+import re
+import unittest
+from unittest import mock
+
+from packaging.requirements import Requirement
 
 import bumpdeps
-from tests import DIFF_BASE, DIFF_EXTRAS, EXAMPLE, MockedResponse, write_and_diff
+from tests import (DIFF_BASE, DIFF_EXTRAS, EXAMPLE, SIMPLE_JSON, MockedResponse, regex,
+                   simple_json, write_and_diff)
+
+
+class TestDumpRequirement(unittest.TestCase):
+    """
+    Tests for converting requirements to strings
+    """
+
+    def test_dump_requirement(self):
+        """All requirement components are included"""
+
+        for text, expected in (
+            ('requests', 'requests'),
+            (
+                'requests[socks]>=2.0,<3.0; python_version < "3.8"',
+                'requests [socks] < 3.0, >= 2.0 ; python_version < "3.8"',
+            ),
+            (
+                'requests@https://example.com/requests.tar.gz',
+                'requests @ https://example.com/requests.tar.gz',
+            ),
+        ):
+            with self.subTest(text=text):
+                requirement = Requirement(text)
+                # pylint: disable=protected-access
+                self.assertEqual(bumpdeps._dump_requirement(requirement), expected)
+
+
+class TestPyPI(MockedResponse):
+    """
+    Tests for querying the package index
+    """
+
+    def test_simple_latest(self):
+        """Latest final release is selected from JSON Simple API"""
+
+        self.responses.get(
+            'https://pypi.org/simple/beta/',
+            json=simple_json(
+                'beta-1.0.tar.gz',
+                'beta-1.0-py3-none-any.whl',
+                'beta-1.1.tar.gz',
+                'beta-2.0b1-py3-none-any.whl',
+                'beta-3.0-py3.7.egg',
+                'beta-latest.tar.gz',
+                yanked=('beta-1.1.tar.gz', 'beta-3.0-py3.7.egg', 'beta-latest.tar.gz'),
+            ),
+            content_type=SIMPLE_JSON, status=200
+        )
+
+        self.assertEqual(bumpdeps.PyPI().get_latest_package_version('beta'), '1.0')
+
+    def test_simple_versions(self):
+        """Versions are used when listed in JSON Simple API"""
+
+        self.responses.get(
+            'https://pypi.org/simple/gamma/',
+            json=simple_json(
+                'gamma-1.0.tar.gz',
+                'gamma-2.0.tar.bz2',
+                'gamma-2.1.tar.gz',
+                'gamma-2.1-py3-none-any.whl',
+                'gamma-2.2.tar.gz',
+                'gamma-2.2-py3-none-any.whl',
+                'gamma-2.3.exe',
+                yanked=('gamma-2.1.tar.gz', 'gamma-2.2.tar.gz', 'gamma-2.2-py3-none-any.whl'),
+                versions=('1.0', '2.0', '2.1', '2.2', '3.0b1', 'latest'),
+            ),
+            content_type=SIMPLE_JSON, status=200
+        )
+
+        # Only releases with all files yanked are excluded
+        self.assertEqual(bumpdeps.PyPI().get_latest_package_version('gamma'), '2.1')
+
+    def test_simple_local_versions(self):
+        """Local versions are ignored in JSON Simple API"""
+
+        self.responses.get(
+            'https://pypi.org/simple/torch/',
+            json=simple_json(
+                'torch-1.0.0.tar.gz',
+                'torch-2.0.0+cpu-cp311-cp311-linux_x86_64.whl',
+            ),
+            content_type=SIMPLE_JSON, status=200
+        )
+
+        self.assertEqual(bumpdeps.PyPI().get_latest_package_version('torch'), '1.0.0')
+
+    def test_simple_prerelease_only(self):
+        """Latest pre-release is selected if there are no final releases"""
+
+        self.responses.get(
+            'https://pypi.org/simple/alpha/',
+            json=simple_json('alpha-1.0a1.tar.gz', 'alpha-1.0a2.zip'),
+            content_type=SIMPLE_JSON, status=200
+        )
+
+        self.assertEqual(bumpdeps.PyPI().get_latest_package_version('alpha'), '1.0a2')
+
+    def test_stdlib_json(self):
+        """Standard library JSON parser is used when orjson is not installed"""
+
+        with mock.patch.object(bumpdeps, 'orjson', None):
+            self.assertEqual(bumpdeps.PyPI().get_latest_package_version('sphinx'), '6.1.2')
+
+            with self.assertRaisesRegex(
+                bumpdeps.BumpDepsError, regex('Invalid JSON returned from package index')
+            ):
+                bumpdeps.PyPI().get_latest_package_version('invalid-json')
+
+    def test_json_fallback(self):
+        """PyPI JSON API is used when JSON Simple API is not usable"""
+
+        pkg_index = bumpdeps.PyPI()
+
+        # JSON Simple API not supported
+        self.assertEqual(pkg_index.get_latest_package_version('legacy'), '2.0.0')
+
+        # HTML Simple API only
+        self.assertEqual(pkg_index.get_latest_package_version('html-only'), '2.0.0')
+
+        # No releases with recognized file names
+        self.assertEqual(pkg_index.get_latest_package_version('eggs-only'), '2.0.0')
+
+        # All releases yanked
+        self.assertEqual(pkg_index.get_latest_package_version('yanked-only'), '2.0.0')
+
+        # Latest release only has legacy file formats
+        self.assertEqual(pkg_index.get_latest_package_version('legacy-latest'), '2.0.0')
+
+        # Package index only implements PyPI JSON API
+        self.assertEqual(pkg_index.get_latest_package_version('json-only'), '2.0.0')
+
+    def test_json_fallback_unexpected(self):
+        """Response from PyPI JSON API does not have expected structure"""
+
+        with self.assertRaisesRegex(
+            bumpdeps.BumpDepsError,
+            regex('Unexpected JSON structure returned from package index: info.version not found')
+        ):
+            bumpdeps.PyPI().get_latest_package_version('legacy-unexpected-json')
+
+        with mock.patch.object(bumpdeps, 'ijson', None):
+            with self.assertRaisesRegex(
+                bumpdeps.BumpDepsError,
+                regex("Unexpected JSON structure returned from package index: {'version': '1.2.3'}")
+            ):
+                bumpdeps.PyPI().get_latest_package_version('legacy-unexpected-json')
+
+    def test_json_fallback_invalid(self):
+        """Response from PyPI JSON API is not valid JSON"""
+
+        with self.assertRaisesRegex(
+            bumpdeps.BumpDepsError, regex('Invalid JSON returned from package index')
+        ):
+            bumpdeps.PyPI().get_latest_package_version('legacy-invalid-json')
+
+    def test_json_fallback_drained(self):
+        """Streamed PyPI JSON API response is read fully so the connection can be reused"""
+
+        with mock.patch('urllib3.response.HTTPResponse.drain_conn', autospec=True) as drain_conn:
+            self.assertEqual(bumpdeps.PyPI().get_latest_package_version('legacy'), '2.0.0')
+
+        drain_conn.assert_called_once()
+
+    def test_json_fallback_no_ijson(self):
+        """PyPI JSON API response is fully parsed when ijson is not installed"""
+
+        with mock.patch.object(bumpdeps, 'ijson', None):
+            self.assertEqual(bumpdeps.PyPI().get_latest_package_version('legacy'), '2.0.0')
 
 
 class TestBumpDeps(MockedResponse):
@@ -20,7 +194,6 @@ class TestBumpDeps(MockedResponse):
     Tests for updating dependencies
     """
 
-    @responses.activate
     def test_base(self):
         """Update only base dependencies"""
 
@@ -35,7 +208,6 @@ class TestBumpDeps(MockedResponse):
         self.assertEqual(updates['optional-dependencies'], {})
         self.assertEqual(result.diff, DIFF_BASE)
 
-    @responses.activate
     def test_base_no_deps(self):
         """No dependencies listed"""
 
@@ -47,7 +219,201 @@ class TestBumpDeps(MockedResponse):
         self.assertEqual(updates['optional-dependencies'], {})
         self.assertEqual(result.diff, tuple())
 
-    @responses.activate
+    def test_cached_lookup(self):
+        """Package index is only queried once for each package"""
+
+        with write_and_diff(
+            '[project]\ndependencies = [\n"Prefixed ~= 0.3.2",\n]\n'
+            '[project.optional-dependencies]\nopt1 = [\n"prefixed ~= 0.3.2",\n]\n'
+        ) as result:
+            bumper = bumpdeps.BumpDeps(result.file)
+            bumper.bump(extras=True, dry_run=True)
+            updates = bumper.bump(extras=True)
+
+        self.assertEqual(updates['dependencies'], [('Prefixed ~= 0.3.2', 'Prefixed ~= 0.6.0')])
+        self.assertEqual(
+            updates['optional-dependencies'],
+            {'opt1': [('prefixed ~= 0.3.2', 'prefixed ~= 0.6.0')]}
+        )
+        self.assertEqual(len(self.responses.calls), 1)
+
+    def test_empty_values(self):
+        """Empty strings in dependency arrays are skipped"""
+
+        for directive in ('', '  # bumpdeps: ignore'):
+            with self.subTest(directive=directive):
+                with write_and_diff(
+                    '[project]\ndependencies = [\n    "",\n    "packaging == 1.0.0",\n'
+                    f'    "six == 1.7.1",{directive}\n]\n'
+                ) as result:
+                    bumper = bumpdeps.BumpDeps(result.file)
+                    updates = bumper.bump()
+
+                self.assertEqual(
+                    updates['dependencies'][0], ('packaging == 1.0.0', 'packaging == 23.1')
+                )
+                self.assertEqual(
+                    result.diff[:2], ('-     "packaging == 1.0.0",', '+     "packaging == 23.1",')
+                )
+
+    def test_comment_lines(self):
+        """Comment-only lines in dependency arrays don't affect updates"""
+
+        for directive in ('', '  # bumpdeps: ignore'):
+            with self.subTest(directive=directive):
+                with write_and_diff(
+                    '[project]\ndependencies = [\n    # Pinned\n    "packaging == 1.0.0",\n'
+                    f'    "requests <= 2.0",\n    "six == 1.7.1",{directive}\n]\n'
+                ) as result:
+                    bumper = bumpdeps.BumpDeps(result.file)
+                    updates = bumper.bump()
+
+                self.assertEqual(
+                    updates['dependencies'][:2],
+                    [
+                        ('packaging == 1.0.0', 'packaging == 23.1'),
+                        ('requests <= 2.0', 'requests <= 2.28.2')
+                    ]
+                )
+                self.assertEqual(
+                    result.diff[:4],
+                    (
+                        '-     "packaging == 1.0.0",',
+                        '+     "packaging == 23.1",',
+                        '-     "requests <= 2.0",',
+                        '+     "requests <= 2.28.2",',
+                    )
+                )
+                self.assertEqual(len(updates['dependencies']), 2 if directive else 3)
+
+    def test_style_preserved_only_when_needed(self):
+        """Style preserving parser is only used for directives or serializing full document"""
+
+        with write_and_diff(
+            '[project]\ndependencies = [\n    "packaging == 1.0.0",  # Pinned\n]\n'
+        ) as result:
+            bumper = bumpdeps.BumpDeps(result.file)
+            tomlkit_loads = bumpdeps.tomlkit.loads
+            with mock.patch.object(bumpdeps.tomlkit, 'loads', wraps=tomlkit_loads) as loads:
+                bumper.bump()
+                loads.assert_not_called()
+
+        self.assertEqual(
+            result.diff,
+            (
+                '-     "packaging == 1.0.0",  # Pinned',
+                '+     "packaging == 23.1",  # Pinned',
+            )
+        )
+
+    def test_style_fallback(self):
+        """Style preserving parser is used when fast parser rejects file"""
+
+        with write_and_diff(
+            "[project]\nauthors = [{name = 'A', email = 'a@b.c',}]\n"
+            "dependencies = [\n    'packaging == 1.0.0',\n]\n"
+        ) as result:
+            bumper = bumpdeps.BumpDeps(result.file)
+            updates = bumper.bump(dry_run=True)
+
+        self.assertEqual(updates['dependencies'], [('packaging == 1.0.0', 'packaging == 23.1')])
+
+    def test_replace_quotes(self):
+        """Requirements containing quotes are replaced in place"""
+
+        with write_and_diff(
+            '[project]\ndependencies = [\n'
+            '    "requests <= 2.0; python_version >= \'3.7\'",\n'
+            "    'packaging == 1.0.0; python_version >= \"3.7\"',\n]\n"
+        ) as result:
+            bumper = bumpdeps.BumpDeps(result.file)
+            with self.assertLogs('bumpdeps', level='DEBUG') as logs:
+                bumper.bump()
+
+        self.assertNotIn(
+            'DEBUG:bumpdeps:Unable to replace requirements in place, serializing full document',
+            logs.output
+        )
+
+        self.assertEqual(
+            result.diff,
+            (
+                '-     "requests <= 2.0; python_version >= \'3.7\'",',
+                '+     "requests <= 2.28.2 ; python_version >= \\"3.7\\"",',
+                "-     'packaging == 1.0.0; python_version >= \"3.7\"',",
+                '+     "packaging == 23.1 ; python_version >= \\"3.7\\"",',
+            )
+        )
+
+    def test_replace_fallback(self):
+        """Full document is serialized when requirements can't be replaced in place"""
+
+        for text, expected in (
+            # Requirement string also found in comment
+            (
+                "[project]\ndependencies = [\n"
+                "    'requests <= 2.0',  # bumpdeps: was 'requests <= 2.0'\n]\n",
+                (
+                    "-     'requests <= 2.0',  # bumpdeps: was 'requests <= 2.0'",
+                    '+     "requests <= 2.28.2",  # bumpdeps: was \'requests <= 2.0\'',
+                ),
+            ),
+            # Requirement string found within multi-line literal string
+            (
+                "[project]\ndependencies = [\n    '''requests <= 2.0''',\n]\n",
+                (
+                    "-     '''requests <= 2.0''',",
+                    '+     "requests <= 2.28.2",',
+                ),
+            ),
+            # File can only be loaded by tomlkit
+            *(
+                (
+                    "[project]\nauthors = [{name = 'A', email = 'a@b.c',}]\n"
+                    f"dependencies = [\n    'requests <= 2.0',{directive}\n]\n",
+                    (
+                        f"-     'requests <= 2.0',{directive}",
+                        f'+     "requests <= 2.28.2",{directive}',
+                    ),
+                )
+                for directive in ('', '  # bumpdeps: ignore-until=1984-01-01')
+            ),
+        ):
+            with self.subTest(text=text):
+                with write_and_diff(text) as result:
+                    bumper = bumpdeps.BumpDeps(result.file)
+                    with self.assertLogs('bumpdeps', level='DEBUG') as logs:
+                        updates = bumper.bump()
+
+                self.assertEqual(
+                    updates['dependencies'], [('requests <= 2.0', 'requests <= 2.28.2')]
+                )
+                self.assertEqual(result.diff, expected)
+                self.assertIn(
+                    'DEBUG:bumpdeps:Unable to replace requirements in place, '
+                    'serializing full document',
+                    logs.output
+                )
+
+    def test_debug(self):
+        """Reasons for skipping packages are logged when debug is enabled"""
+
+        with write_and_diff(EXAMPLE) as result:
+            bumper = bumpdeps.BumpDeps(result.file)
+            with self.assertLogs('bumpdeps', level='DEBUG') as logs:
+                bumper.bump(extras=True, include='[a-r]', exclude='six', dry_run=True)
+
+        for message in (
+            'Skipping package six for exclude filter: six',
+            'Skipping package sphinx for include filter: [a-r]',
+            'Skipping package pydantic for comment:   # bumpdeps: ignore',
+            'Skipping package prefixed since no specifiers defined',
+            'Latest version for package enlighten is 1.11.1',
+            'Skipping package enlighten since latest version applies',
+            "Updating specifiers for requirement 'packaging == 1.0.0'",
+        ):
+            self.assertIn(f'DEBUG:bumpdeps:{message}', logs.output)
+
     def test_dry_run(self):
         """Updates returns, but file is not updated"""
 
@@ -62,7 +428,6 @@ class TestBumpDeps(MockedResponse):
 
         self.assertEqual(result.diff, tuple())
 
-    @responses.activate
     def test_extras(self):
         """Update all extras"""
 
@@ -83,7 +448,6 @@ class TestBumpDeps(MockedResponse):
         )
         self.assertEqual(result.diff, DIFF_EXTRAS)
 
-    @responses.activate
     def test_extras_specific(self):
         """Update specific extra"""
 
@@ -106,7 +470,6 @@ class TestBumpDeps(MockedResponse):
             )
         )
 
-    @responses.activate
     def test_regex_exclude(self):
         """Exclude dependencies with regex"""
 
@@ -127,7 +490,39 @@ class TestBumpDeps(MockedResponse):
             )
         )
 
-    @responses.activate
+    def test_regex_exclude_names(self):
+        """Exclude dependencies with alternation of names"""
+
+        with write_and_diff(EXAMPLE) as result:
+            bumper = bumpdeps.BumpDeps(result.file)
+            updates = bumper.bump(exclude='req|enlighten')
+
+        self.assertEqual(
+            updates['dependencies'],
+            [('packaging == 1.0.0', 'packaging == 23.1')]
+        )
+        self.assertEqual(updates['optional-dependencies'], {})
+
+        self.assertEqual(
+            result.diff, (
+                "-     'packaging == 1.0.0',",
+                '+     "packaging == 23.1",',
+            )
+        )
+
+    def test_regex_after_parse(self):
+        """Filters are checked after parsing if name can't be determined beforehand"""
+
+        with write_and_diff(EXAMPLE) as result:
+            bumper = bumpdeps.BumpDeps(result.file)
+            with mock.patch.object(bumpdeps, 'NAME_RE', re.compile(r'(?!)')):
+                for include, exclude in (('pack.*', None), (None, 'req|enlighten')):
+                    with self.subTest(include=include, exclude=exclude):
+                        updates = bumper.bump(include=include, exclude=exclude, dry_run=True)
+                        self.assertEqual(
+                            updates['dependencies'], [('packaging == 1.0.0', 'packaging == 23.1')]
+                        )
+
     def test_regex_include(self):
         """Include dependencies with regex"""
 
@@ -154,7 +549,6 @@ class TestBumpDepsErrors(MockedResponse):
     Tests for errors raise in BumpDeps class
     """
 
-    @responses.activate
     def test_extras_unknown(self):
         """Unknown extras provided"""
 
@@ -177,10 +571,9 @@ class TestBumpDepsErrors(MockedResponse):
 
         filename = 'NOT_A_REAL_FILE.toml'
         bumper = bumpdeps.BumpDeps(filename)
-        with self.assertRaisesRegex(bumpdeps.BumpDepsError, f'Error loading {filename}'):
+        with self.assertRaisesRegex(bumpdeps.BumpDepsError, regex(f'Error loading {filename}')):
             bumper.bump()
 
-    @responses.activate
     def test_ignore_until_format_invalid(self):
         """ignore-until format is not valid"""
 
@@ -200,7 +593,6 @@ class TestBumpDepsErrors(MockedResponse):
         self.assertEqual(updates['optional-dependencies'], {})
         self.assertEqual(result.diff, tuple())
 
-    @responses.activate
     def test_ignore_until_date_invalid(self):
         """Data is not a valid date"""
 
@@ -224,10 +616,28 @@ class TestBumpDepsErrors(MockedResponse):
         """Requirement does not have valid format"""
         with write_and_diff('[project]\ndependencies = [\n"requests !! 1.2.3" \n]\n') as result:
             bumper = bumpdeps.BumpDeps(result.file)
-            with self.assertRaisesRegex(bumpdeps.BumpDepsError, 'Invalid requirement'):
+            with self.assertRaisesRegex(bumpdeps.BumpDepsError, regex('Invalid requirement')):
                 bumper.bump()
 
-    @responses.activate
+    def test_requirement_name_invalid(self):
+        """Requirement does not have valid name"""
+        with write_and_diff('[project]\ndependencies = [\n"-requests == 1.2.3" \n]\n') as result:
+            bumper = bumpdeps.BumpDeps(result.file)
+            with self.assertRaisesRegex(bumpdeps.BumpDepsError, regex('Invalid requirement')):
+                bumper.bump(exclude='foo')
+
+    def test_requirement_invalid_filtered(self):
+        """Invalid requirement is rejected even if the start of its name matches a filter"""
+
+        for requirement in ('requests !! 1.2.3', 'foo% == 1', 'foo/bar == 1'):
+            with self.subTest(requirement=requirement):
+                with write_and_diff(f'[project]\ndependencies = [\n"{requirement}"\n]\n') as result:
+                    bumper = bumpdeps.BumpDeps(result.file)
+                    with self.assertRaisesRegex(
+                        bumpdeps.BumpDepsError, regex('Invalid requirement')
+                    ):
+                        bumper.bump(exclude='req|foo')
+
     def test_response_error(self):
         """Bad response from package index"""
         with write_and_diff(
@@ -235,11 +645,26 @@ class TestBumpDepsErrors(MockedResponse):
         ) as result:
             bumper = bumpdeps.BumpDeps(result.file)
             with self.assertRaisesRegex(
-                bumpdeps.BumpDepsError, 'Unable to query package index for no_such_package'
+                bumpdeps.BumpDepsError, regex('Unable to query package index for no_such_package')
+            ):
+                bumper.bump()
+
+    def test_version_invalid(self):
+        """Latest version from package index can't be used in specifiers"""
+
+        self.responses.get('https://pypi.org/simple/torch/', status=406)
+        self.responses.get(
+            'https://pypi.org/pypi/torch/json', json={'info': {'version': '2.0.0+cpu'}}, status=200
+        )
+
+        with write_and_diff('[project]\ndependencies = [\n"torch <= 1.0" \n]\n') as result:
+            bumper = bumpdeps.BumpDeps(result.file)
+            with self.assertRaisesRegex(
+                bumpdeps.BumpDepsError,
+                regex("Unable to update requirement 'torch <= 1.0' to version 2.0.0\\+cpu")
             ):
                 bumper.bump()
 
-    @responses.activate
     def test_response_json_invalid(self):
         """Response from package index is not valid JSON"""
         with write_and_diff(
@@ -247,11 +672,10 @@ class TestBumpDepsErrors(MockedResponse):
         ) as result:
             bumper = bumpdeps.BumpDeps(result.file)
             with self.assertRaisesRegex(
-                bumpdeps.BumpDepsError, 'Invalid JSON returned from package index'
+                bumpdeps.BumpDepsError, regex('Invalid JSON returned from package index')
             ):
                 bumper.bump()
 
-    @responses.activate
     def test_response_json_unexpected(self):
         """Response from package index does not have expected structure"""
         with write_and_diff(
@@ -260,7 +684,7 @@ class TestBumpDepsErrors(MockedResponse):
             bumper = bumpdeps.BumpDeps(result.file)
             with self.assertRaisesRegex(
                 bumpdeps.BumpDepsError,
-                "Unexpected JSON structure returned from package index: {'version': '1.2.3'}"
+                regex("Unexpected JSON structure returned from package index: {'version': '1.2.3'}")
             ):
                 bumper.bump()
 
@@ -268,12 +692,16 @@ class TestBumpDepsErrors(MockedResponse):
         """Invalid TOML in file"""
         with write_and_diff('{"json": true}') as result:
             bumper = bumpdeps.BumpDeps(result.file)
-            with self.assertRaisesRegex(bumpdeps.BumpDepsError, f'Error loading {result.file}'):
+            with self.assertRaisesRegex(
+                bumpdeps.BumpDepsError, regex(f'Error loading {result.file}')
+            ):
                 bumper.bump()
 
     def test_toml_project_missing(self):
         """TOML file does not have required 'project' section"""
         with write_and_diff('[foobar]\nfoo = "bar"\n') as result:
             bumper = bumpdeps.BumpDeps(result.file)
-            with self.assertRaisesRegex(bumpdeps.BumpDepsError, 'No project section in file'):
+            with self.assertRaisesRegex(
+                bumpdeps.BumpDepsError, regex('No project section in file')
+            ):
                 bumper.bump()
@@ -9,13 +9,11 @@
 **BumpDeps CLI Unit Tests**
 """
 
-from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from contextlib import ExitStack, contextmanager, redirect_stderr, redirect_stdout
 from io import StringIO
 
-import responses
-
 import bumpdeps
-from tests import DIFF_BASE, DIFF_EXTRAS, EXAMPLE, MockedResponse, write_and_diff
+from tests import DIFF_ALL, DIFF_BASE, DIFF_EXTRAS, EXAMPLE, MockedResponse, regex, write_and_diff
 
 
 class MockedCLI(MockedResponse):
@@ -23,6 +21,15 @@ class MockedCLI(MockedResponse):
     Provides additional methods to simplify writing CLI tests
     """
 
+    @classmethod
+    def setUpClass(cls) -> None:
+
+        super().setUpClass()
+
+        # Output buffers are shared by all tests in the class and cleared before each use
+        cls._err_buf = StringIO()
+        cls._out_buf = StringIO()
+
     @contextmanager
     def write_and_diff(self, text):
         """
@@ -30,25 +37,31 @@ class MockedCLI(MockedResponse):
         Return a summary of the differences and system outputs on close
         """
 
-        with write_and_diff(text) as result:
-            with self.assertRaises(SystemExit) as sys_exit:
-                with redirect_stderr(StringIO()) as err, redirect_stdout(StringIO()) as out:
-                    with self.assertLogs('bumpdeps', level='ERROR') as logs:
-                        yield result
+        for buf in (self._err_buf, self._out_buf):
+            buf.seek(0)
+            buf.truncate()
+
+        with ExitStack() as stack:
+            result = stack.enter_context(write_and_diff(text))
+            sys_exit = stack.enter_context(self.assertRaises(SystemExit))
+            stack.enter_context(redirect_stderr(self._err_buf))
+            stack.enter_context(redirect_stdout(self._out_buf))
+            logs = stack.enter_context(self.assertLogs('bumpdeps', level='ERROR'))
+            yield result
 
         result.exit_code = sys_exit.exception.code
         result.logs = logs.output
-        result.stderr = err.getvalue()
-        result.stdout = out.getvalue()
+        result.stderr = self._err_buf.getvalue()
+        result.stdout = self._out_buf.getvalue()
 
-    def check_result_error(self, result, regex):
+    def check_result_error(self, result, pattern):
         """
         Check result object for single logged exception
         """
 
         self.assertEqual(result.exit_code, 8)
         self.assertEqual(len(result.logs), 1)
-        self.assertRegex(result.logs[0], regex)
+        self.assertRegex(result.logs[0], regex(pattern))
         self.assertEqual(result.stderr, '')
         self.assertEqual(result.stdout, '')
         self.assertEqual(result.diff, ())
@@ -68,7 +81,6 @@ class TestMain(MockedCLI):
     Tests for CLI entry point
     """
 
-    @responses.activate
     def test_all(self):
         """Update all dependencies"""
 
@@ -99,9 +111,8 @@ class TestMain(MockedCLI):
                 '    --> six == 1.16.0\n'
             )
         )
-        self.assertEqual(result.diff, DIFF_BASE + DIFF_EXTRAS)
+        self.assertEqual(result.diff, DIFF_ALL)
 
-    @responses.activate
     def test_base_no_deps(self):
         """No dependencies listed"""
 
@@ -112,7 +123,6 @@ class TestMain(MockedCLI):
         self.assertEqual(result.stdout, 'No updates required\n')
         self.assertEqual(result.diff, ())
 
-    @responses.activate
     def test_base_only(self):
         """Update only base dependencies"""
 
@@ -133,7 +143,6 @@ class TestMain(MockedCLI):
         )
         self.assertEqual(result.diff, DIFF_BASE)
 
-    @responses.activate
     def test_dry_run(self):
         """Updates returns, but file is not updated"""
 
@@ -154,7 +163,6 @@ class TestMain(MockedCLI):
         )
         self.assertEqual(result.diff, ())
 
-    @responses.activate
     def test_extras(self):
         """Update all extras"""
 
@@ -183,7 +191,6 @@ class TestMain(MockedCLI):
         )
         self.assertEqual(result.diff, DIFF_EXTRAS)
 
-    @responses.activate
     def test_extras_specific(self):
         """Update specific extra"""
 
@@ -208,7 +215,6 @@ class TestMain(MockedCLI):
             )
         )
 
-    @responses.activate
     def test_regex_exclude(self):
         """Exclude dependencies with regex"""
 
@@ -232,7 +238,6 @@ class TestMain(MockedCLI):
             )
         )
 
-    @responses.activate
     def test_regex_include(self):
         """Include dependencies with regex"""
 
@@ -262,7 +267,6 @@ class TestMainErrors(MockedCLI):
     Tests for CLI Errors
     """
 
-    @responses.activate
     def test_extras_unknown(self):
         """Unknown extras provided"""
 
@@ -286,11 +290,10 @@ class TestMainErrors(MockedCLI):
 
         self.assertEqual(result.exit_code, 2)
         self.assertEqual(len(result.logs), 0)
-        self.assertRegex(result.stderr, 'File NOT_A_REAL_FILE.toml does not exist')
+        self.assertRegex(result.stderr, regex('File NOT_A_REAL_FILE.toml does not exist'))
         self.assertEqual(result.stdout, '')
         self.assertEqual(result.diff, ())
 
-    @responses.activate
     def test_ignore_until_format_invalid(self):
         """ignore-until format is not valid"""
 
@@ -308,7 +311,6 @@ class TestMainErrors(MockedCLI):
         self.assertEqual(result.stdout, 'No updates required\n')
         self.assertEqual(result.diff, ())
 
-    @responses.activate
     def test_ignore_until_date_invalid(self):
         """Data is not a valid date"""
 
@@ -334,7 +336,7 @@ class TestMainErrors(MockedCLI):
 
         self.assertEqual(result.exit_code, 2)
         self.assertEqual(len(result.logs), 0)
-        self.assertRegex(result.stderr,  r"Invalid regex '\(' provided for --exclude")
+        self.assertRegex(result.stderr, regex(r"Invalid regex '\(' provided for --exclude"))
         self.assertEqual(result.stdout, '')
         self.assertEqual(result.diff, ())
 
@@ -346,7 +348,7 @@ class TestMainErrors(MockedCLI):
 
         self.assertEqual(result.exit_code, 2)
         self.assertEqual(len(result.logs), 0)
-        self.assertRegex(result.stderr,  r"Invalid regex '\(' provided for --include")
+        self.assertRegex(result.stderr, regex(r"Invalid regex '\(' provided for --include"))
         self.assertEqual(result.stdout, '')
         self.assertEqual(result.diff, ())
 
@@ -360,7 +362,6 @@ class TestMainErrors(MockedCLI):
 
         self.check_result_error(result, 'Invalid requirement')
 
-    @responses.activate
     def test_response_error(self):
         """Bad response from package index"""
 
@@ -371,7 +372,6 @@ class TestMainErrors(MockedCLI):
 
         self.check_result_error(result, 'Unable to query package index for no_such_package')
 
-    @responses.activate
     def test_response_json_invalid(self):
         """Response from package index is not valid JSON"""
 
@@ -382,7 +382,6 @@ class TestMainErrors(MockedCLI):
 
         self.check_result_error(result, 'Invalid JSON returned from package index')
 
-    @responses.activate
     def test_response_json_unexpected(self):
         """Response from package index does not have expected structure"""
 